@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-15 21:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["owner", "scheduled_date"], name="tx_owner_date_idx"
+            ),
+        ),
+    ]
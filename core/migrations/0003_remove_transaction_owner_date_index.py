@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-15 21:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_transaction_owner_date_index"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="tx_owner_date_idx",
+        ),
+    ]
@@ -27,6 +27,12 @@ class Edge(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
+        # Ids only, so logging or repr'ing an edge never queries its nodes
+        return f"{self.source_id} → {self.target_id}"
+
+    @property
+    def display_name(self):
+        """Node names; select_related('source', 'target') before using in bulk."""
         return f"{self.source.name} → {self.target.name}"
 
 class Transaction(models.Model):
@@ -40,4 +46,9 @@ class Transaction(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.edge} - {self.amount}"
\ No newline at end of file
+        return f"Edge {self.edge_id} - {self.amount}"
+
+    @property
+    def display_name(self):
+        """Edge node names; select_related('edge__source', 'edge__target') before using in bulk."""
+        return f"{self.edge.display_name} - {self.amount}"
\ No newline at end of file
@@ -18,4 +18,13 @@ class TransactionSerializer(serializers.ModelSerializer):
         model = Transaction
         fields = ['id', 'edge', 'amount', 'scheduled_date', 'is_recurring', 
                  'recurrence_interval', 'created_at', 'updated_at']
-        read_only_fields = ['owner']
\ No newline at end of file
+        read_only_fields = ['owner']
+
+class SimulateInputSerializer(serializers.Serializer):
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError('end_date must not be before start_date')
+        return data
\ No newline at end of file
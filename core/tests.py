@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -5,9 +6,12 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
 from core.models import Node, Edge, Transaction
-from simulation.engine import NetworkSimulator
+from simulation.engine import NetworkSimulator, _apply, _apply_parallel
 from decimal import Decimal
 from datetime import timedelta
+from unittest import skipIf
+from unittest.mock import patch
+import numpy as np
 
 class NodeModelTest(TestCase):
     def setUp(self):
@@ -45,7 +49,8 @@ class EdgeModelTest(TestCase):
             owner=self.user
         )
         self.assertEqual(edge.weight, Decimal('1000.00'))
-        self.assertEqual(str(edge), 'Checking → Rent')
+        self.assertEqual(str(edge), f'{self.source.id} → {self.target.id}')
+        self.assertEqual(edge.display_name, 'Checking → Rent')
 
 class NodeAPITest(APITestCase):
     def setUp(self):
@@ -104,6 +109,241 @@ class SimulationTest(TestCase):
         
         expected_balance = float(self.account.balance) + (5000.00 * 2)
         self.assertEqual(
-            results[self.account.id]['balance'],
+            results[self.account.id],
             expected_balance
-        )
\ No newline at end of file
+        )
+
+    def test_simulation_query_count(self):
+        now = timezone.now()
+        for _ in range(3):
+            Transaction.objects.create(
+                edge=self.edge,
+                amount=Decimal('100.00'),
+                scheduled_date=now,
+                owner=self.user
+            )
+        
+        # Transactions are loaded with the network, not per simulation
+        simulator = NetworkSimulator(self.user.id)
+        with self.assertNumQueries(0):
+            simulator.simulate_transactions(now, now + timedelta(days=1))
+
+    def test_simulation_long_horizon_recurrence(self):
+        now = timezone.now()
+        Transaction.objects.create(
+            edge=self.edge,
+            amount=Decimal('10.00'),
+            scheduled_date=now,
+            is_recurring=True,
+            recurrence_interval=timedelta(days=1),
+            owner=self.user
+        )
+        
+        simulator = NetworkSimulator(self.user.id)
+        results = simulator.simulate_transactions(
+            now,
+            now + timedelta(days=365)
+        )
+        
+        # The occurrence landing exactly on end_date is excluded
+        self.assertEqual(
+            results[self.account.id],
+            float(self.account.balance) + 10.00 * 365
+        )
+        self.assertEqual(
+            results[self.income.id],
+            float(self.income.balance) - 10.00 * 365
+        )
+
+    def test_simulation_sums_cents_exactly(self):
+        now = timezone.now()
+        for _ in range(3):
+            Transaction.objects.create(
+                edge=self.edge,
+                amount=Decimal('0.10'),
+                scheduled_date=now,
+                owner=self.user
+            )
+        
+        simulator = NetworkSimulator(self.user.id)
+        results = simulator.simulate_transactions(now, now + timedelta(days=1))
+        self.assertEqual(results[self.account.id], 1000.30)
+        self.assertEqual(results[self.income.id], 4999.70)
+
+    def test_simulation_skips_transactions_on_foreign_edges(self):
+        other = User.objects.create_user('other', 'other@test.com', 'testpass')
+        source = Node.objects.create(name='Other', node_type='ACCOUNT', owner=other)
+        target = Node.objects.create(name='Other Rent', node_type='EXPENSE', owner=other)
+        foreign_edge = Edge.objects.create(source=source, target=target, owner=other)
+        now = timezone.now()
+        Transaction.objects.create(
+            edge=foreign_edge,
+            amount=Decimal('100.00'),
+            scheduled_date=now - timedelta(days=400),
+            owner=self.user
+        )
+        
+        simulator = NetworkSimulator(self.user.id)
+        results = simulator.simulate_transactions(now, now + timedelta(days=1))
+        self.assertEqual(results[self.account.id], 1000.00)
+
+    def test_get_or_build_reuses_cached_network(self):
+        cache.clear()
+        NetworkSimulator.get_or_build(self.user.id)
+        
+        # Only the version check runs while the network is unchanged
+        with self.assertNumQueries(1):
+            simulator = NetworkSimulator.get_or_build(self.user.id)
+        self.assertEqual(simulator.balances[simulator.node_index[self.account.id]], 100000)
+        
+        self.account.balance = Decimal('2500.00')
+        self.account.save()
+        simulator = NetworkSimulator.get_or_build(self.user.id)
+        self.assertEqual(simulator.balances[simulator.node_index[self.account.id]], 250000)
+
+    def test_get_or_build_picks_up_new_transactions(self):
+        cache.clear()
+        now = timezone.now()
+        end = now + timedelta(days=1)
+        simulator = NetworkSimulator.get_or_build(self.user.id)
+        self.assertEqual(simulator.simulate_transactions(now, end)[self.account.id], 1000.00)
+        
+        Transaction.objects.create(
+            edge=self.edge,
+            amount=Decimal('300.00'),
+            scheduled_date=now,
+            owner=self.user
+        )
+        simulator = NetworkSimulator.get_or_build(self.user.id)
+        self.assertEqual(simulator.simulate_transactions(now, end)[self.account.id], 1300.00)
+
+    def test_network_metrics(self):
+        Node.objects.create(
+            name='Rent',
+            node_type='EXPENSE',
+            balance=Decimal('0.10'),
+            owner=self.user
+        )
+        
+        simulator = NetworkSimulator(self.user.id)
+        self.assertEqual(simulator.get_network_metrics(), {
+            'total_nodes': 3,
+            'total_edges': 1,
+            'income_nodes': 1,
+            'expense_nodes': 1,
+            'net_flow': 6000.10
+        })
+
+    @skipIf(_apply_parallel is None, 'numba is not installed')
+    def test_parallel_apply_matches_serial(self):
+        rng = np.random.default_rng(0)
+        src = rng.integers(0, 20, 5000)
+        tgt = rng.integers(0, 20, 5000)
+        deltas = rng.integers(1, 1000, 5000, dtype=np.int64)
+        
+        serial = np.zeros(20, dtype=np.int64)
+        parallel = np.zeros(20, dtype=np.int64)
+        _apply(serial, src, tgt, deltas)
+        _apply_parallel(parallel, src, tgt, deltas, 4)
+        np.testing.assert_array_equal(serial, parallel)
+
+    @skipIf(_apply_parallel is None, 'numba is not installed')
+    def test_simulation_uses_parallel_kernel_for_large_batches(self):
+        now = timezone.now()
+        for _ in range(4):
+            Transaction.objects.create(
+                edge=self.edge,
+                amount=Decimal('100.00'),
+                scheduled_date=now,
+                owner=self.user
+            )
+        
+        simulator = NetworkSimulator(self.user.id)
+        with patch('simulation.engine.PARALLEL_MIN_TRANSACTIONS', 0), \
+                patch('simulation.engine.get_num_threads', return_value=2), \
+                patch('simulation.engine._apply_parallel', wraps=_apply_parallel) as kernel:
+            results = simulator.simulate_transactions(now, now + timedelta(days=1))
+        kernel.assert_called_once()
+        self.assertEqual(results[self.account.id], 1400.00)
+        self.assertEqual(results[self.income.id], 4600.00)
+
+class SimulateAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', 'test@test.com', 'testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('transaction-simulate')
+        cache.clear()
+        self.income = Node.objects.create(
+            name='Salary',
+            node_type='INCOME',
+            balance=Decimal('5000.00'),
+            owner=self.user
+        )
+        self.account = Node.objects.create(
+            name='Checking',
+            node_type='ACCOUNT',
+            balance=Decimal('1000.00'),
+            owner=self.user
+        )
+        self.edge = Edge.objects.create(
+            source=self.income,
+            target=self.account,
+            weight=Decimal('5000.00'),
+            owner=self.user
+        )
+        self.now = timezone.now()
+        Transaction.objects.create(
+            edge=self.edge,
+            amount=Decimal('250.00'),
+            scheduled_date=self.now,
+            owner=self.user
+        )
+    
+    def test_simulate(self):
+        data = {
+            'start_date': self.now.isoformat(),
+            'end_date': (self.now + timedelta(days=30)).isoformat()
+        }
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            response.json()['simulation_results'],
+            {str(self.income.id): 4750.0, str(self.account.id): 1250.0}
+        )
+
+    def test_simulate_rejects_invalid_dates(self):
+        response = self.client.post(self.url, {
+            'start_date': 'not-a-date',
+            'end_date': self.now.isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start_date', response.json())
+
+    def test_simulate_rejects_end_before_start(self):
+        response = self.client.post(self.url, {
+            'start_date': self.now.isoformat(),
+            'end_date': (self.now - timedelta(days=1)).isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()['non_field_errors'],
+            ['end_date must not be before start_date']
+        )
+
+    def test_simulate_only_changed(self):
+        Node.objects.create(
+            name='Rent',
+            node_type='EXPENSE',
+            owner=self.user
+        )
+        data = {
+            'start_date': self.now.isoformat(),
+            'end_date': (self.now + timedelta(days=30)).isoformat()
+        }
+        response = self.client.post(f'{self.url}?only_changed=true', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()['simulation_results'],
+            {str(self.income.id): 4750.0, str(self.account.id): 1250.0}
+        )
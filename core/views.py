@@ -2,9 +2,11 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from datetime import datetime
+from rest_framework.renderers import JSONRenderer
 from .models import Node, Edge, Transaction
-from .serializers import NodeSerializer, EdgeSerializer, TransactionSerializer
+from .serializers import (
+    NodeSerializer, EdgeSerializer, TransactionSerializer, SimulateInputSerializer
+)
 from simulation.engine import NetworkSimulator
 
 class NodeViewSet(viewsets.ModelViewSet):
@@ -37,13 +39,16 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], renderer_classes=[JSONRenderer])
     def simulate(self, request):
-        start_date = datetime.fromisoformat(request.data.get('start_date'))
-        end_date = datetime.fromisoformat(request.data.get('end_date'))
+        params = SimulateInputSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        start_date = params.validated_data['start_date']
+        end_date = params.validated_data['end_date']
         
-        simulator = NetworkSimulator(request.user.id)
-        results = simulator.simulate_transactions(start_date, end_date)
+        simulator = NetworkSimulator.get_or_build(request.user.id)
+        only_changed = request.query_params.get('only_changed', '').lower() in ('1', 'true')
+        results = simulator.simulate_transactions(start_date, end_date, only_changed)
         metrics = simulator.get_network_metrics()
         
         return Response({
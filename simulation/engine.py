@@ -1,67 +1,218 @@
-import networkx as nx
-from datetime import datetime, timedelta
+import numpy as np
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import BigIntegerField, Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Cast, Round
 from core.models import Node, Edge, Transaction
 
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # numba is optional; fall back to NumPy scatter-adds
+    njit = None
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+CENTS = 100
+NETWORK_CACHE_TIMEOUT = 300
+LOAD_CHUNK_SIZE = 2000
+# The parallel kernel keeps one partial balance row per thread, so it only
+# pays off once transactions far outnumber nodes
+PARALLEL_MIN_TRANSACTIONS = 100_000
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _apply(balances, src, tgt, deltas):
+        for i in range(src.shape[0]):
+            balances[src[i]] -= deltas[i]
+            balances[tgt[i]] += deltas[i]
+
+    @njit(parallel=True, cache=True)
+    def _apply_parallel(balances, src, tgt, deltas, nchunks):
+        # Each chunk of transactions scatters into its own row, so threads
+        # never write to the same slot; rows are reduced afterwards
+        partial = np.zeros((nchunks, balances.shape[0]), dtype=balances.dtype)
+        size = (src.shape[0] + nchunks - 1) // nchunks
+        for c in prange(nchunks):
+            for i in range(c * size, min((c + 1) * size, src.shape[0])):
+                partial[c, src[i]] -= deltas[i]
+                partial[c, tgt[i]] += deltas[i]
+        balances += partial.sum(axis=0)
+else:
+    def _apply(balances, src, tgt, deltas):
+        # np.add.at is unbuffered, so repeated node indices accumulate
+        np.add.at(balances, src, -deltas)
+        np.add.at(balances, tgt, deltas)
+
+    _apply_parallel = None
+
+
+def _cents(field: str):
+    # Money is simulated as exact int64 cents, converted by the database
+    return Cast(Round(F(field) * CENTS), output_field=BigIntegerField())
+
+
+def _epoch_us(value: datetime) -> int:
+    # Exact integer microseconds; datetime.timestamp() would round via float
+    return (value - EPOCH) // MICROSECOND
+
+
 class NetworkSimulator:
     def __init__(self, user_id: int):
         self.user_id = user_id
-        self.graph = nx.DiGraph()
+        self.node_ids: List[int] = []
+        self.node_index: Dict[int, int] = {}
+        self.balances = np.empty(0, dtype=np.int64)
+        self.types: Dict[int, str] = {}
+        self.edge_endpoints: Dict[int, Tuple[int, int]] = {}
+        self.edge_count = 0
+        self.type_counts: Counter = Counter()
+        self.net_flow = 0
+        self.tx_source = np.empty(0, dtype=np.int64)
+        self.tx_target = np.empty(0, dtype=np.int64)
+        self.tx_amount = np.empty(0, dtype=np.int64)
+        self.tx_scheduled_us = np.empty(0, dtype=np.int64)
+        self.tx_interval_us = np.empty(0, dtype=np.int64)
         self._load_network()
 
+    @classmethod
+    def get_or_build(cls, user_id: int) -> 'NetworkSimulator':
+        """Return a simulator for the user, reusing a cached network load
+        while none of the user's nodes, edges or transactions have changed."""
+        key = f'simnet:{user_id}:{cls._network_version(user_id)}'
+        simulator = cache.get(key)
+        if simulator is None:
+            simulator = cls(user_id)
+            cache.set(key, simulator, NETWORK_CACHE_TIMEOUT)
+        return simulator
+
+    @staticmethod
+    def _network_version(user_id: int) -> str:
+        # Row counts catch deletions, which leave max(updated_at) untouched.
+        # All tables are summarised as subqueries of a single statement so
+        # the cache check costs one database round-trip.
+        stats = {}
+        for name, model in (('node', Node), ('edge', Edge), ('transaction', Transaction)):
+            owned = model.objects.filter(owner_id=OuterRef('pk')).order_by().values('owner_id')
+            stats[f'{name}_count'] = Subquery(owned.annotate(n=Count('id')).values('n'))
+            stats[f'{name}_updated'] = Subquery(owned.annotate(u=Max('updated_at')).values('u'))
+        row = User.objects.filter(pk=user_id).values(**stats).first() or {}
+
+        parts = []
+        for name in ('node', 'edge', 'transaction'):
+            updated = row.get(f'{name}_updated')
+            parts.append(f"{row.get(f'{name}_count') or 0}-{updated.timestamp() if updated else 0}")
+        return ':'.join(parts)
+
     def _load_network(self):
-        nodes = Node.objects.filter(owner_id=self.user_id)
-        edges = Edge.objects.filter(owner_id=self.user_id)
+        nodes = Node.objects.filter(owner_id=self.user_id).values_list(
+            'id', _cents('balance'), 'node_type'
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE)
+        edges = Edge.objects.filter(owner_id=self.user_id).values_list(
+            'id', 'source_id', 'target_id'
+        ).iterator(chunk_size=LOAD_CHUNK_SIZE)
         
-        for node in nodes:
-            self.graph.add_node(node.id, 
-                              balance=float(node.balance),
-                              type=node.node_type)
+        balances = []
+        for node_id, balance, node_type in nodes:
+            self.node_ids.append(node_id)
+            balances.append(balance)
+            self.types[node_id] = node_type
         
-        for edge in edges:
-            self.graph.add_edge(edge.source.id, 
-                              edge.target.id,
-                              weight=float(edge.weight))
-
-    def simulate_transactions(self, start_date: datetime, end_date: datetime) -> Dict:
-        transactions = Transaction.objects.filter(
-            owner_id=self.user_id,
-            scheduled_date__range=(start_date, end_date)
+        self.type_counts = Counter(self.types.values())
+        # Balances live in one contiguous array, addressed through node_index
+        self.node_index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.balances = np.array(balances, dtype=np.int64)
+        self.net_flow = sum(balances)
+        # Endpoints are stored as node indices so transactions need no join
+        self.edge_endpoints = {
+            edge_id: (self.node_index[source_id], self.node_index[target_id])
+            for edge_id, source_id, target_id in edges
+        }
+        self.edge_count = len(self.edge_endpoints)
+        self._load_transactions()
+
+    def _load_transactions(self):
+        # Everything about a transaction that does not depend on the simulated
+        # window is resolved here, once per network version, so simulate calls
+        # only do the window arithmetic on ready-made arrays
+        rows = Transaction.objects.filter(owner_id=self.user_id).values_list(
+            'edge_id', _cents('amount'),
+            'scheduled_date', 'is_recurring', 'recurrence_interval'
         )
+        # A transaction can point at an edge outside this user's network;
+        # it has no endpoints here, so leave it out rather than fail
+        rows = [row for row in rows if row[0] in self.edge_endpoints]
         
-        simulation_results = {
-            node_id: {'balance': self.graph.nodes[node_id]['balance']}
-            for node_id in self.graph.nodes
-        }
+        edge_ids, amounts, dates, recurring, intervals = zip(*rows) if rows else ((),) * 5
+        count = len(edge_ids)
+
+        endpoints = np.array([self.edge_endpoints[e] for e in edge_ids],
+                             dtype=np.int64).reshape(count, 2)
+        self.tx_source = np.ascontiguousarray(endpoints[:, 0])
+        self.tx_target = np.ascontiguousarray(endpoints[:, 1])
+        self.tx_amount = np.asarray(amounts, dtype=np.int64)
+        # Times are int64 microseconds since the epoch; an interval of 0 marks
+        # a transaction that does not recur
+        self.tx_scheduled_us = np.fromiter((_epoch_us(d) for d in dates),
+                                           dtype=np.int64, count=count)
+        self.tx_interval_us = np.fromiter(
+            (i // MICROSECOND if r and i and i > timedelta(0) else 0
+             for r, i in zip(recurring, intervals)),
+            dtype=np.int64, count=count
+        )
+
+    def simulate_transactions(self, start_date: datetime, end_date: datetime,
+                              only_changed: bool = False) -> Dict:
+        balances = self.balances.copy()
+        touched = np.empty(0, dtype=np.int64)
+        start_us = _epoch_us(start_date)
+        end_us = _epoch_us(end_date)
+
+        # Transactions scheduled within [start_date, end_date]
+        window = (self.tx_scheduled_us >= start_us) & (self.tx_scheduled_us <= end_us)
+        count = int(np.count_nonzero(window))
+
+        if count:
+            until_end = end_us - self.tx_scheduled_us[window]
+            interval_us = self.tx_interval_us[window]
 
-        for transaction in transactions:
-            source_id = transaction.edge.source.id
-            target_id = transaction.edge.target.id
-            amount = float(transaction.amount)
+            # Initial transaction if it falls before end_date
+            occurrences = (until_end > 0).astype(np.int64)
 
-            # Process initial transaction
-            if start_date <= transaction.scheduled_date < end_date:
-                simulation_results[source_id]['balance'] -= amount
-                simulation_results[target_id]['balance'] += amount
+            # Recurrences: every scheduled_date + k * interval (k >= 1) that
+            # falls strictly before end_date
+            repeats = interval_us > 0
+            occurrences[repeats] += np.clip(
+                (until_end[repeats] - 1) // interval_us[repeats], 0, None
+            )
 
-            # Process recurring transactions
-            if transaction.is_recurring and transaction.recurrence_interval:
-                next_date = transaction.scheduled_date + transaction.recurrence_interval
-                while next_date < end_date:  # Changed <= to <
-                    simulation_results[source_id]['balance'] -= amount
-                    simulation_results[target_id]['balance'] += amount
-                    next_date += transaction.recurrence_interval
+            src_idx = self.tx_source[window]
+            tgt_idx = self.tx_target[window]
+            deltas = self.tx_amount[window] * occurrences
+            if only_changed:
+                active = occurrences > 0
+                touched = np.union1d(src_idx[active], tgt_idx[active])
+            if (_apply_parallel is not None
+                    and count >= PARALLEL_MIN_TRANSACTIONS
+                    and count >= get_num_threads() * len(balances)):
+                _apply_parallel(balances, src_idx, tgt_idx, deltas, get_num_threads())
+            else:
+                _apply(balances, src_idx, tgt_idx, deltas)
 
-        return simulation_results
+        if only_changed:
+            return dict(zip((self.node_ids[i] for i in touched.tolist()),
+                            (balances[touched] / CENTS).tolist()))
+        return dict(zip(self.node_ids, (balances / CENTS).tolist()))
 
     def get_network_metrics(self) -> Dict:
         return {
-            'total_nodes': self.graph.number_of_nodes(),
-            'total_edges': self.graph.number_of_edges(),
-            'income_nodes': len([n for n in self.graph.nodes 
-                               if self.graph.nodes[n]['type'] == 'INCOME']),
-            'expense_nodes': len([n for n in self.graph.nodes 
-                                if self.graph.nodes[n]['type'] == 'EXPENSE']),
-            'net_flow': sum(self.graph.nodes[n]['balance'] for n in self.graph.nodes)
+            'total_nodes': len(self.node_ids),
+            'total_edges': self.edge_count,
+            'income_nodes': self.type_counts['INCOME'],
+            'expense_nodes': self.type_counts['EXPENSE'],
+            'net_flow': self.net_flow / CENTS
         }
\ No newline at end of file